@@ -1,10 +1,8 @@
-import tempfile
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
 
-from src.mcqgenerator.MCQGenerator import generate_mcqs
+from src.mcqgenerator.MCQGenerator import generate_mcqs_stream
 from src.mcqgenerator.utils import quiz_dict_to_table
 from src.mcqgenerator.logger import logger
 
@@ -27,27 +25,26 @@ if submit_button:
     suffix = Path(uploaded_file.name).suffix.lower()
 
     try:
+        # Rows are rendered as each question finishes streaming
+        table = st.empty()
         with st.spinner("Generating MCQs..."):
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(uploaded_file.getbuffer())
-                tmp_path = tmp.name
-
-            quiz_dict, info = generate_mcqs(
-                input_file_path=tmp_path,
+            for quiz_dict, info in generate_mcqs_stream(
+                input_file_path=uploaded_file.getvalue(),
+                suffix=suffix,
                 number=int(number_of_mcqs),
                 subject=subject,
                 tone=tone,
-            )
+            ):
+                if info.get("reset"):
+                    table.empty()  # retrying: drop rows from the failed attempt
+                    continue
+                table.dataframe(quiz_dict_to_table(quiz_dict), use_container_width=True)
 
         logger.info(f"MCQs generated. Info: {info}")
 
         st.success("MCQs generated successfully!")
         st.caption(f"Questions returned: {len(quiz_dict)}")
 
-        rows = quiz_dict_to_table(quiz_dict)
-        df = pd.DataFrame(rows)
-        st.dataframe(df, use_container_width=True)
-
         with st.expander("Raw JSON"):
             st.json(quiz_dict)
 
@@ -4,6 +4,6 @@ setup(
     version='0.0.1', 
     author='Mah-Rukh Fida',
     author_email='mrukh@glos.ac.uk',   
-    install_requires=['openai','langchain','streamlit','python-dotenv','PyPDF2'],                      
+    install_requires=['openai','langchain','streamlit','python-dotenv','PyPDF2','diskcache','tiktoken','httpx[http2]'],                      
     packages=find_packages()
 )
\ No newline at end of file
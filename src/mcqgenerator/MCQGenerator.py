@@ -1,25 +1,302 @@
 import os
 import json
 import re
+import functools
+import hashlib
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional
+from typing import IO, TYPE_CHECKING, Dict, Any, Iterator, List, Tuple, Optional, Union
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:  # orjson is an optional speedup
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
 
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
-from src.mcqgenerator.utils import read_file, load_json
+from src.mcqgenerator.utils import read_file
+from src.mcqgenerator import cache
+from src.mcqgenerator.logger import logger
+
+# langchain, httpx and tiktoken are imported where first used so that
+# importing this module (e.g. on a Streamlit cold start) stays cheap.
+if TYPE_CHECKING:
+    import httpx
+    import tiktoken
+    from langchain_core.prompts import PromptTemplate
+    from langchain_openai import ChatOpenAI
+
+# Read .env once per process tree rather than on every request
+if not os.environ.get("_MCQ_ENV_LOADED"):
+    load_dotenv(override=True)
+    os.environ["_MCQ_ENV_LOADED"] = "1"
+
+
+@functools.lru_cache(maxsize=1)
+def _http_client() -> "httpx.Client":
+    """Shared HTTP/2 connection pool for every ChatOpenAI client in this process."""
+    import httpx
+
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20),
+        timeout=60.0,
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _load_template(path: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Load a JSON template once and return (parsed dict, compact JSON string).
+    Cached so repeated calls skip the disk read, parse and re-serialization.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = _json_loads(f.read())
+    return data, _json_dumps(data)
+
+
+# Static instructions + schema come first so the prompt prefix is identical
+# across calls and can be served from the provider's prompt cache.
+STATIC_PREFIX = """
+You are an expert at creating multiple-choice questions (MCQs) for educational purposes.
+
+Return ONLY valid JSON. No extra text, no markdown, no code fences.
+
+Rules:
+- Use ONLY the provided text.
+- Do not repeat questions.
+- Use keys "1".."N" exactly, where N is the requested number of MCQs (all keys must be present).
+- Each question must include options a/b/c/d.
+- "correct" must be one of: "a", "b", "c", "d".
+- RESPONSE_JSON shows the structure for ONE question only. Replicate it to produce keys "1".."N".
+- Avoid always choosing the same correct letter; spread answers across a/b/c/d.
+
+### RESPONSE_JSON (structure/template only; values are placeholders)
+{response_json}
+""".strip()
+
+# Per-request values go last.
+DYNAMIC_SUFFIX = """
+TEXT:
+{text}
+
+Generate exactly {number} MCQs (N = {number}) for {subject} students in a {tone} tone.
+""".strip()
+
+QUIZ_TEMPLATE = f"{STATIC_PREFIX}\n\n{DYNAMIC_SUFFIX}"
+
+SUMMARY_TEMPLATE = """
+Summarize the following content into concise study notes for exam prep.
+Keep the summary under ~1200 words. Preserve key definitions, steps, distinctions, and important facts.
+Return plain text only.
+
+CONTENT:
+{text}
+""".strip()
+
+
+@functools.lru_cache(maxsize=1)
+def _quiz_prompt() -> "PromptTemplate":
+    """Quiz-generation prompt, built on first use."""
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(
+        input_variables=["text", "number", "subject", "tone", "response_json"],
+        template=QUIZ_TEMPLATE,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _summary_prompt() -> "PromptTemplate":
+    """Summarization prompt, built on first use."""
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(input_variables=["text"], template=SUMMARY_TEMPLATE)
+
+
+# Only these characters can change the scanner state; everything else is
+# skipped inside the C regex engine instead of the Python loop.
+_JSON_STRUCT_RE = re.compile(r'[{}"\\]')
+
+
+def _find_json_span(s: str) -> Tuple[int, int]:
+    """
+    Return (start, end) of the first balanced {...} object in s, end inclusive.
+    Single linear scan; braces inside JSON strings are ignored.
+    """
+    start = s.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in LLM output.")
+
+    depth = 0
+    in_string = False
+    escaped_at = -1
+    for m in _JSON_STRUCT_RE.finditer(s, start):
+        i = m.start()
+        ch = s[i]
+        if in_string:
+            if i == escaped_at:
+                continue
+            if ch == "\\":
+                escaped_at = i + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return start, i
+
+    raise ValueError("Unbalanced JSON object in LLM output.")
 
 
 def _extract_json(text: str) -> Dict[str, Any]:
     """
     Extract and parse the first JSON object found in model output.
     """
-    match = re.search(r"\{.*\}", text, flags=re.DOTALL)
-    if not match:
-        raise ValueError("No JSON object found in LLM output.")
-    return json.loads(match.group(0))
+    start, end = _find_json_span(text)
+    return _json_loads(text[start:end + 1])
+
+
+# Structural characters for _try_repair; like _JSON_STRUCT_RE plus arrays.
+_JSON_REPAIR_RE = re.compile(r'[{}\[\]"\\]')
+
+
+def _try_repair(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Cheap local fix-ups for almost-valid JSON: drop trailing commas and close
+    unbalanced braces/brackets. String contents are never touched.
+    Returns None if the result still does not parse.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    parts: List[str] = []
+    closers: List[str] = []
+    last = start
+    in_string = False
+    escaped_at = -1
+    for m in _JSON_REPAIR_RE.finditer(text, start):
+        i = m.start()
+        ch = text[i]
+        if in_string:
+            if i == escaped_at:
+                continue
+            if ch == "\\":
+                escaped_at = i + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            # A comma right before a closer (whitespace aside) is necessarily
+            # outside any string, since we are outside one here.
+            segment = text[last:i].rstrip()
+            if segment.endswith(","):
+                segment = segment[:-1]
+            parts.append(segment + ch)
+            last = i + 1
+            if closers:
+                closers.pop()
+            if not closers:
+                break
+
+    if closers:
+        if in_string:
+            return None
+        tail = text[last:].rstrip()
+        if tail.endswith(","):
+            tail = tail[:-1]
+        parts.append(tail + "".join(reversed(closers)))
+
+    try:
+        return _json_loads("".join(parts))
+    except ValueError:
+        return None
+
+
+def _parse_quiz(output_text: str, number: int) -> Dict[str, Any]:
+    """
+    Parse and validate model output, attempting a local repair before
+    giving up so a malformed-but-close response doesn't cost another LLM call.
+    """
+    try:
+        quiz = _extract_json(output_text)
+    except ValueError:
+        quiz = _try_repair(output_text)
+        if quiz is None:
+            raise
+    _validate_quiz(quiz, number)
+    return quiz
+
+
+_KEY_BEFORE_OBJ_RE = re.compile(r'"([^"\\]*)"\s*:\s*$')
+
+
+class _QuestionStream:
+    """
+    Incremental scanner over streamed quiz JSON. feed() takes the next chunk
+    and returns the (key, question) pairs whose objects closed in it, so rows
+    can be shown before the whole response has arrived.
+    """
+
+    def __init__(self) -> None:
+        self.buf = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped_at = -1
+        self.obj_start = -1
+        self.prev_end = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        self.buf += chunk
+        done: List[Tuple[str, Dict[str, Any]]] = []
+        for m in _JSON_STRUCT_RE.finditer(self.buf, self.pos):
+            i = m.start()
+            ch = self.buf[i]
+            if self.in_string:
+                if i == self.escaped_at:
+                    continue
+                if ch == "\\":
+                    self.escaped_at = i + 1
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                # Quotes before the opening brace are chatter, not JSON
+                self.in_string = self.depth > 0
+            elif ch == "{":
+                self.depth += 1
+                if self.depth == 2:
+                    self.obj_start = i
+            elif ch == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 1 and self.obj_start >= 0:
+                    key = _KEY_BEFORE_OBJ_RE.search(self.buf, self.prev_end, self.obj_start)
+                    try:
+                        obj = _json_loads(self.buf[self.obj_start:i + 1])
+                    except ValueError:
+                        obj = None
+                    if key and isinstance(obj, dict):
+                        done.append((key.group(1), obj))
+                    self.prev_end = i + 1
+                    self.obj_start = -1
+        self.pos = len(self.buf)
+        return done
 
 
 def _validate_quiz(quiz: Dict[str, Any], number: int) -> None:
@@ -37,131 +314,411 @@ def _validate_quiz(quiz: Dict[str, Any], number: int) -> None:
             raise ValueError(f"Expected keys {expected_keys}, got {actual_keys}")
 
     for k in expected_keys:
-        item = quiz.get(k, {})
-        if "mcq" not in item or "options" not in item or "correct" not in item:
-            raise ValueError(f"Question {k} missing required fields.")
+        _validate_question(k, quiz.get(k, {}))
+
+
+def _validate_question(k: str, item: Any) -> None:
+    """
+    Validate one question: mcq, options a/b/c/d (as a dict), correct in a/b/c/d.
+    """
+    if not isinstance(item, dict) or "mcq" not in item or "options" not in item or "correct" not in item:
+        raise ValueError(f"Question {k} missing required fields.")
+
+    options = item.get("options") or {}
+    if not isinstance(options, dict):
+        raise ValueError(f"Question {k} options must be an object keyed a/b/c/d.")
+    for opt in ["a", "b", "c", "d"]:
+        if opt not in options:
+            raise ValueError(f"Question {k} missing option '{opt}'.")
 
-        options = item.get("options") or {}
-        for opt in ["a", "b", "c", "d"]:
-            if opt not in options:
-                raise ValueError(f"Question {k} missing option '{opt}'.")
+    correct = item.get("correct")
+    if correct not in ["a", "b", "c", "d"]:
+        raise ValueError(f"Question {k} has invalid correct answer: {correct}")
 
-        correct = item.get("correct")
-        if correct not in ["a", "b", "c", "d"]:
-            raise ValueError(f"Question {k} has invalid correct answer: {correct}")
 
+@functools.lru_cache(maxsize=1)
+def _encoding(model: str) -> "tiktoken.Encoding":
+    """tiktoken encoder for the model (cached; building it is expensive)."""
+    import tiktoken
 
-def _maybe_summarize(llm: ChatOpenAI, text: str, max_chars: int = 18000) -> str:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@dataclass
+class Document:
     """
-    Keep prompts under control. If text is too long, summarize to study notes.
-    (Char-based control; simple and effective for avoiding token overflow.)
+    Input text plus identity/size facts computed once and shared downstream.
+    tokens is computed on first access only, so cache hits never tokenize.
     """
-    if len(text) <= max_chars:
-        return text
+    text: str
+    digest: str
+    model: str
 
-    summary_prompt = PromptTemplate(
-        input_variables=["text"],
-        template="""
-Summarize the following content into concise study notes for exam prep.
-Keep the summary under ~1200 words. Preserve key definitions, steps, distinctions, and important facts.
-Return plain text only.
+    @functools.cached_property
+    def tokens(self) -> List[int]:
+        return _encoding(self.model).encode_ordinary(self.text)
 
-CONTENT:
-{text}
-""".strip(),
+    @property
+    def token_len(self) -> int:
+        return len(self.tokens)
+
+
+def _make_document(text: str, model: str) -> Document:
+    """Hash the text; tokens are left to Document.tokens."""
+    return Document(
+        text=text,
+        digest=hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest(),
+        model=model,
     )
-    chain = summary_prompt | llm | StrOutputParser()
-    return chain.invoke({"text": text})
 
 
-def generate_mcqs(
-    input_file_path: str,
-    number: int = 5,
-    subject: str = "General",
-    tone: str = "educational",
+# Prompt budget for the input text, in model tokens. Between MAX_INPUT_TOKENS
+# and TRUNCATE_FACTOR times that, the text is cut; beyond, it is summarized
+# in MAX_INPUT_TOKENS-sized chunks. utils.MAX_PDF_CHARS is sized against these.
+MAX_INPUT_TOKENS = 12000
+TRUNCATE_FACTOR = 2.0
+
+
+def _fit_text(
+    doc: Document,
     model: str = "gpt-3.5-turbo",
-    temperature: float = 0.3,
-) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    max_tokens: int = MAX_INPUT_TOKENS,
+    truncate_factor: float = TRUNCATE_FACTOR,
+) -> Optional[str]:
+    """
+    Text to send for doc, measured in model tokens, or None if it needs summarizing.
+    - fits in max_tokens: returned unchanged
+    - up to truncate_factor * max_tokens: cut at the max_tokens boundary (no LLM call)
+    - longer: None
     """
-    Generate MCQs from a PDF/TXT file path.
+    if doc.token_len <= max_tokens:
+        return doc.text
+    if doc.token_len <= max_tokens * truncate_factor:
+        logger.warning(
+            f"Input document {doc.digest}: truncated from {doc.token_len} to {max_tokens} tokens"
+        )
+        return _encoding(model).decode(doc.tokens[:max_tokens])
+    return None
 
-    Returns:
-        quiz_dict: {"1": {...}, "2": {...}, ...}
-        token_info: dict (if you track tokens outside, you can ignore this)
+
+def _summary_chunks(doc: Document, max_tokens: int = MAX_INPUT_TOKENS) -> List[str]:
     """
-    load_dotenv(override=True)
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found. Put it in .env or environment variables.")
+    Split doc on token boundaries into pieces that each fit one summary call,
+    so the whole document is summarized rather than overflowing the model.
+    """
+    enc = _encoding(doc.model)
+    return [
+        enc.decode(doc.tokens[i:i + max_tokens])
+        for i in range(0, doc.token_len, max_tokens)
+    ]
 
-    project_root = Path(__file__).resolve().parents[2]
-    response_json_path = project_root / "Response.json"
-    if not response_json_path.exists():
-        raise FileNotFoundError(f"Missing Response.json at: {response_json_path}")
 
-    response_json = load_json(str(response_json_path))
+def _summary_chain(llm: "ChatOpenAI") -> Any:
+    """Summarization chain (prompt | llm | parser) on the given client."""
+    from langchain_core.output_parsers import StrOutputParser
+
+    return _summary_prompt() | llm | StrOutputParser()
+
+
+def _maybe_summarize(llm: "ChatOpenAI", doc: Document, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Keep prompts under control: the text from _fit_text, or study notes
+    summarized by the LLM, chunk by chunk, when the document is too long to truncate.
+    """
+    text = _fit_text(doc, model)
+    if text is not None:
+        return text
+    chunks = _summary_chunks(doc)
+    summaries = _summary_chain(llm).batch([{"text": chunk} for chunk in chunks])
+    return "\n\n".join(summaries)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_chain(model: str, temperature: float, schema_str: str, api_key: str) -> Tuple["ChatOpenAI", Any]:
+    """
+    Create the LLM client and quiz chain once per configuration, so the
+    client's HTTP connection pool is reused across calls.
+    """
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_openai import ChatOpenAI
 
     llm = ChatOpenAI(
         model=model,
         temperature=temperature,
         api_key=api_key,
+        http_client=_http_client(),
     )
+    return llm, _quiz_prompt().partial(response_json=schema_str) | llm | StrOutputParser()
 
-    raw_text = read_file(input_file_path)
-    text = _maybe_summarize(llm, raw_text)
 
-    TEMPLATE = """
-You are an expert at creating multiple-choice questions (MCQs) for educational purposes.
+def _build_chain(model: str, temperature: float) -> Tuple["ChatOpenAI", Any]:
+    """
+    Return the (cached) LLM client and quiz-generation chain (prompt | llm | parser).
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found. Put it in .env or environment variables.")
 
-Return ONLY valid JSON. No extra text, no markdown, no code fences.
+    project_root = Path(__file__).resolve().parents[2]
+    response_json_path = project_root / "Response.json"
+    if not response_json_path.exists():
+        raise FileNotFoundError(f"Missing Response.json at: {response_json_path}")
 
-Rules:
-- Generate exactly {number} MCQs for {subject} students in a {tone} tone.
-- Use ONLY the provided text.
-- Do not repeat questions.
-- Use keys "1"..."{number}" exactly (all keys must be present).
-- Each question must include options a/b/c/d.
-- "correct" must be one of: "a", "b", "c", "d".
-- RESPONSE_JSON shows the structure for ONE question only. Replicate it to produce keys "1"..."{number}".
-- Avoid always choosing the same correct letter; spread answers across a/b/c/d.
+    _, response_json_str = _load_template(str(response_json_path))
+    return _get_chain(model, temperature, response_json_str, api_key)
 
-TEXT:
-{text}
 
-### RESPONSE_JSON (structure/template only; values are placeholders)
-{response_json}
-""".strip()
+def _lookup(
+    source: Union[str, bytes, IO[bytes]],
+    number: int,
+    subject: str,
+    tone: str,
+    model: str,
+    suffix: Optional[str] = None,
+) -> Tuple[Document, str, Optional[Dict[str, Any]]]:
+    """
+    Read the input into a Document and check the quiz cache, keyed on the
+    raw input's digest. Returns (doc, cache_key, cached quiz or None).
+    """
+    doc = _make_document(read_file(source, suffix=suffix), model)
+    cache_key = cache.make_key(model, number, subject, tone, doc.digest)
+    cached = cache.get_quiz(cache_key)
+    if cached is None:
+        logger.info(f"Input document {doc.digest}: {doc.token_len} tokens")
+    else:
+        logger.info(f"Input document {doc.digest}: quiz cache hit")
+    return doc, cache_key, cached
 
-    prompt = PromptTemplate(
-        input_variables=["text", "number", "subject", "tone", "response_json"],
-        template=TEMPLATE,
-    )
 
-    chain = prompt | llm | StrOutputParser()
+def _prepare(
+    source: Union[str, bytes, IO[bytes]],
+    number: int,
+    subject: str,
+    tone: str,
+    model: str,
+    temperature: float,
+    suffix: Optional[str] = None,
+) -> Tuple[Any, Optional[Dict[str, Any]], str, Optional[Dict[str, Any]]]:
+    """
+    Shared preamble of the generate_mcqs* entry points: build the chain, read
+    and size the input, and look up the quiz cache.
+
+    The cache is keyed on the raw input's digest and checked before any
+    truncation/summarization, so a hit never pays for a summary call.
+
+    Returns (chain, inputs, cache_key, cached). On a cache hit, cached is
+    the stored quiz and inputs is None.
+    """
+    llm, chain = _build_chain(model, temperature)
+
+    doc, cache_key, cached = _lookup(source, number, subject, tone, model, suffix)
+    if cached is not None:
+        return chain, None, cache_key, cached
 
     inputs = {
-        "text": text,
+        "text": _maybe_summarize(llm, doc, model),
         "number": number,
         "subject": subject,
         "tone": tone,
-        "response_json": json.dumps(response_json),
     }
+    return chain, inputs, cache_key, None
+
+
+def generate_mcqs(
+    input_file_path: Union[str, bytes, IO[bytes]],
+    number: int = 5,
+    subject: str = "General",
+    tone: str = "educational",
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.3,
+    suffix: Optional[str] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Generate MCQs from input_file_path: a PDF/TXT file path, or the file's
+    raw bytes or a binary file object (pass suffix=".pdf"/".txt" in that case).
+
+    Returns:
+        quiz_dict: {"1": {...}, "2": {...}, ...}
+        token_info: dict (if you track tokens outside, you can ignore this)
+    """
+    chain, inputs, cache_key, cached = _prepare(
+        input_file_path, number, subject, tone, model, temperature, suffix
+    )
+    if cached is not None:
+        return cached, {"attempts": 0, "cached": True}
 
     # Try once, then retry once if parsing/validation fails
     last_error: Optional[Exception] = None
     for attempt in range(2):
         try:
-            output_text = chain.invoke(inputs)
-            quiz = _extract_json(output_text)
-            _validate_quiz(quiz, number)
+            quiz = _parse_quiz(chain.invoke(inputs), number)
+            cache.set_quiz(cache_key, quiz)
             return quiz, {"attempts": attempt + 1}
         except Exception as e:
             last_error = e
-            # strengthen the instruction a bit on retry
-            inputs["tone"] = tone
-            inputs["subject"] = subject
-            inputs["text"] = text
-            # Add a nudge without changing the schema
-            inputs["response_json"] = json.dumps(response_json)
+
+    raise RuntimeError(f"Failed to generate a valid quiz after retries. Last error: {last_error}")
+
+
+def generate_mcqs_batch(
+    requests: List[Dict[str, Any]],
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.3,
+) -> List[Union[Tuple[Dict[str, Any], Dict[str, Any]], Exception]]:
+    """
+    Generate MCQs for several files concurrently.
+
+    Each request is a dict of generate_mcqs keyword arguments
+    (input_file_path, and optionally number/subject/tone/suffix). Cache misses are
+    sent together through chain.batch, with up to MCQ_CONCURRENCY (default 8)
+    requests in flight; documents that need summarizing are summarized the
+    same way first. Results come back in the same order as `requests`.
+
+    Failures are per item: a request that cannot be read, summarized or
+    turned into a valid quiz (after one retry) gets its exception in its
+    slot instead of a (quiz_dict, info) tuple, and the others still return.
+
+    For large offline jobs, OpenAI's Batch API is cheaper (50% discount, up to
+    24h turnaround): write one /v1/chat/completions body per line to a JSONL
+    file, upload it with files.create(purpose="batch"), then submit it with
+    batches.create(endpoint="/v1/chat/completions", completion_window="24h").
+    """
+    llm, chain = _build_chain(model, temperature)
+    config = {"max_concurrency": int(os.getenv("MCQ_CONCURRENCY", "8"))}
+
+    results: List[Any] = [None] * len(requests)
+    pending: Dict[int, Dict[str, Any]] = {}
+    to_summarize: Dict[int, List[str]] = {}
+    for idx, req in enumerate(requests):
+        number = req.get("number", 5)
+        subject = req.get("subject", "General")
+        tone = req.get("tone", "educational")
+        try:
+            doc, cache_key, cached = _lookup(
+                req["input_file_path"], number, subject, tone, model, req.get("suffix")
+            )
+        except Exception as e:
+            results[idx] = e
+            continue
+        if cached is not None:
+            results[idx] = (cached, {"attempts": 0, "cached": True})
+            continue
+
+        text = _fit_text(doc, model)
+        if text is None:
+            to_summarize[idx] = _summary_chunks(doc)
+        pending[idx] = {
+            "inputs": {"text": text, "number": number, "subject": subject, "tone": tone},
+            "cache_key": cache_key,
+        }
+
+    if to_summarize:
+        # All chunks of all long documents go out in one batch, then regroup
+        owners = [idx for idx, chunks in to_summarize.items() for _ in chunks]
+        summaries = _summary_chain(llm).batch(
+            [{"text": chunk} for chunks in to_summarize.values() for chunk in chunks],
+            config=config,
+            return_exceptions=True,
+        )
+        grouped: Dict[int, List[Any]] = {idx: [] for idx in to_summarize}
+        for idx, summary in zip(owners, summaries):
+            grouped[idx].append(summary)
+        for idx, parts in grouped.items():
+            failed = next((p for p in parts if isinstance(p, Exception)), None)
+            if failed is not None:
+                results[idx] = failed
+                del pending[idx]
+            else:
+                pending[idx]["inputs"]["text"] = "\n\n".join(parts)
+
+    # Try once, then retry the failed ones once
+    errors: Dict[int, Exception] = {}
+    for attempt in range(2):
+        if not pending:
+            break
+        indices = list(pending)
+        outputs = chain.batch(
+            [pending[i]["inputs"] for i in indices],
+            config=config,
+            return_exceptions=True,
+        )
+        for idx, output_text in zip(indices, outputs):
+            try:
+                if isinstance(output_text, Exception):
+                    raise output_text
+                quiz = _parse_quiz(output_text, pending[idx]["inputs"]["number"])
+            except Exception as e:
+                errors[idx] = e
+                continue
+            cache.set_quiz(pending[idx]["cache_key"], quiz)
+            results[idx] = (quiz, {"attempts": attempt + 1})
+            errors.pop(idx, None)
+            del pending[idx]
+
+    for idx in pending:
+        results[idx] = RuntimeError(
+            f"Failed to generate a valid quiz after retries. Last error: {errors[idx]}"
+        )
+
+    return results
+
+
+def generate_mcqs_stream(
+    input_file_path: Union[str, bytes, IO[bytes]],
+    number: int = 5,
+    subject: str = "General",
+    tone: str = "educational",
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.3,
+    suffix: Optional[str] = None,
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Streaming variant of generate_mcqs.
+
+    Yields (quiz_so_far, {"partial": True}) each time another question
+    finishes streaming and passes _validate_question (malformed ones are
+    held back; the final validation decides), then a final (quiz_dict, info)
+    exactly as generate_mcqs would return it. Any failure (API error
+    mid-stream, invalid output) is retried once with a fresh stream; the
+    retry starts by yielding ({}, {"partial": True, "reset": True}) so
+    consumers can drop rows shown from the failed attempt.
+    """
+    chain, inputs, cache_key, cached = _prepare(
+        input_file_path, number, subject, tone, model, temperature, suffix
+    )
+    if cached is not None:
+        yield cached, {"attempts": 0, "cached": True}
+        return
+
+    # Try once, then retry once on any failure (API/network errors while
+    # streaming included), as generate_mcqs does
+    last_error: Optional[Exception] = None
+    for attempt in range(2):
+        try:
+            scanner = _QuestionStream()
+            partial: Dict[str, Any] = {}
+            if attempt > 0:
+                yield {}, {"partial": True, "reset": True}
+            for chunk in chain.stream(inputs):
+                for key, question in scanner.feed(chunk):
+                    try:
+                        _validate_question(key, question)
+                    except ValueError:
+                        continue
+                    partial[key] = question
+                    yield dict(partial), {"partial": True}
+
+            quiz = _parse_quiz(scanner.buf, number)
+        except Exception as e:
+            last_error = e
+            logger.info(f"Streamed quiz attempt {attempt + 1} failed: {e}")
+            continue
+
+        cache.set_quiz(cache_key, quiz)
+        yield quiz, {"attempts": attempt + 1}
+        return
 
     raise RuntimeError(f"Failed to generate a valid quiz after retries. Last error: {last_error}")
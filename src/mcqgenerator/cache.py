@@ -0,0 +1,35 @@
+import hashlib
+from typing import TYPE_CHECKING, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    import diskcache
+
+CACHE_DIR = ".mcq_cache"
+
+_cache: Optional["diskcache.Cache"] = None
+
+
+def _get_cache() -> "diskcache.Cache":
+    """Open the on-disk quiz cache lazily (SQLite-backed via diskcache)."""
+    global _cache
+    if _cache is None:
+        import diskcache
+
+        _cache = diskcache.Cache(CACHE_DIR)
+    return _cache
+
+
+def make_key(model: str, number: int, subject: str, tone: str, text_digest: str) -> str:
+    """Content-addressed key for a quiz request (text given by its digest)."""
+    payload = f"{model}|{number}|{subject}|{tone}|{text_digest}"
+    return hashlib.blake2b(payload.encode("utf-8")).hexdigest()
+
+
+def get_quiz(key: str) -> Optional[Dict[str, Any]]:
+    """Return a cached quiz dict, or None on miss."""
+    return _get_cache().get(key)
+
+
+def set_quiz(key: str, quiz: Dict[str, Any]) -> None:
+    """Store a validated quiz dict under its key."""
+    _get_cache().set(key, quiz)
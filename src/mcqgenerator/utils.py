@@ -1,49 +1,161 @@
-import json
-import traceback
-from typing import Dict, Any, List
-from pypdf import PdfReader
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, TYPE_CHECKING, Dict, Any, Iterator, Optional, Tuple, Union
 
+# Plain module logger (handlers come from src.mcqgenerator.logger's basicConfig);
+# importing that module here would open a new log file in every PDF worker process.
+logger = logging.getLogger(__name__)
 
-def read_file(file_path: str) -> str:
-    """Read text from a local PDF/TXT file path."""
-    if file_path.lower().endswith(".pdf"):
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Stop extracting pages once this much text is collected. At ~4 chars per
+# token this is ~50k tokens: well past the point (MCQGenerator.MAX_INPUT_TOKENS
+# * TRUNCATE_FACTOR = 24k tokens) where long documents are summarized chunk by
+# chunk instead of truncated, so any PDF that long still reaches the summary
+# path. Only text past this cap is dropped, and read_file logs when that happens.
+MAX_PDF_CHARS = 200_000
+
+# Below this page count, process start-up costs more than it saves.
+PARALLEL_MIN_PAGES = 4
+
+# PDFium is not thread-safe, even across documents, and Streamlit runs each
+# session in its own thread; only one document is processed at a time.
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _extract_one(args: Tuple[str, int]) -> str:
+    """Extract text from a single PDF page (runs in a worker process)."""
+    from pypdf import PdfReader
+
+    file_path, index = args
+    return PdfReader(file_path).pages[index].extract_text() or ""
+
+
+def _extract_pages_parallel(file_path: str, n_pages: int) -> Iterator[str]:
+    """
+    Yield page texts in order, extracting them across a process pool.
+    Pages are submitted one batch (of pool size) at a time so the caller can
+    stop early without paying for the rest of the document.
+    """
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for start in range(0, n_pages, workers):
+            batch = [(file_path, i) for i in range(start, min(start + workers, n_pages))]
+            yield from ex.map(_extract_one, batch)
+
+
+def _pdfium_pages(pdfium: Any, source: Union[str, bytes]) -> Iterator[str]:
+    """
+    Yield page texts with pypdfium2. _PDFIUM_LOCK is held from opening the
+    document until it is closed, i.e. until the generator is exhausted or
+    closed, so the caller must close() it when stopping early.
+    """
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(source)
         try:
-            reader = PdfReader(file_path)
-            parts = []
-            for page in reader.pages:
-                extracted = page.extract_text()
+            for page in pdf:
+                textpage = page.get_textpage()
+                yield textpage.get_text_bounded()
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+
+
+def _pypdf_pages(source: Union[str, bytes]) -> Iterator[str]:
+    """
+    Yield page texts with pypdf. Larger files on disk are extracted across a
+    process pool; in-memory PDFs stay serial rather than shipping the bytes
+    to every worker.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+    n_pages = len(reader.pages)
+    if not isinstance(source, str) or n_pages < PARALLEL_MIN_PAGES:
+        return (page.extract_text() for page in reader.pages)
+    return _extract_pages_parallel(source, n_pages)
+
+
+def _pdf_pages(source: Union[str, bytes]) -> Iterator[str]:
+    """
+    Yield page texts in order. Uses PDFium (pypdfium2) when installed, which
+    is much faster than pure-Python pypdf and needs no process pool;
+    otherwise falls back to pypdf.
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return _pypdf_pages(source)
+    return _pdfium_pages(pdfium, source)
+
+
+def read_file(source: Union[str, bytes, IO[bytes]], *, suffix: Optional[str] = None) -> str:
+    """
+    Read text from a PDF/TXT file path, or from its raw bytes / a binary
+    file object (e.g. a Streamlit upload) without writing it to disk.
+    suffix (".pdf" or ".txt") is required for non-path sources.
+    """
+    if isinstance(source, str):
+        suffix = suffix or os.path.splitext(source)[1]
+    elif not suffix:
+        raise ValueError("suffix is required when reading from bytes or a file object.")
+    elif isinstance(source, bytearray):
+        source = bytes(source)
+    elif not isinstance(source, bytes):
+        source = source.read()
+    suffix = suffix.lower()
+
+    if suffix == ".pdf":
+        pages = None
+        try:
+            pages = _pdf_pages(source)
+
+            buf = io.StringIO()
+            for extracted in pages:
                 if extracted:
-                    parts.append(extracted)
-            return "\n".join(parts)
+                    buf.write(extracted)
+                    buf.write("\n")
+                if buf.tell() > MAX_PDF_CHARS:
+                    logger.warning(
+                        f"PDF text reached MAX_PDF_CHARS ({MAX_PDF_CHARS}); remaining pages skipped"
+                    )
+                    break
+            return buf.getvalue()
         except Exception as e:
             raise Exception(f"Error reading PDF file: {e}")
+        finally:
+            if pages is not None:
+                pages.close()  # release the PDFium lock / worker pool, even on early stop or error
 
-    if file_path.lower().endswith(".txt"):
-        with open(file_path, "r", encoding="utf-8") as f:
+    if suffix == ".txt":
+        if not isinstance(source, str):
+            return source.decode("utf-8")
+        with open(source, "r", encoding="utf-8") as f:
             return f.read()
 
     raise ValueError("Unsupported file format. Please upload a PDF or TXT file.")
 
 
-def load_json(path: str) -> Dict[str, Any]:
-    """Load a JSON file from disk."""
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def quiz_dict_to_table(quiz_dict: Dict[str, Any]) -> List[Dict[str, str]]:
+def quiz_dict_to_table(quiz_dict: Dict[str, Any]) -> "pd.DataFrame":
     """
-    Convert quiz dict (keys '1'..'N') to table rows for Streamlit/DataFrame.
+    Convert quiz dict (keys '1'..'N') to a DataFrame for Streamlit,
+    one column per option (A-D).
+    Columns are built directly, so pandas doesn't have to pivot row dicts.
     """
-    try:
-        rows = []
-        for _, value in quiz_dict.items():
-            mcq = value.get("mcq", "")
-            options_dict = value.get("options", {}) or {}
-            choices = ".||.".join([f"{k}) {v}" for k, v in options_dict.items()])
-            correct = value.get("correct", "")
-            rows.append({"MCQ": mcq, "Choices": choices, "Correct": correct})
-        return rows
-    except Exception as e:
-        traceback.print_exception(type(e), e, e.__traceback__)
-        return []
+    import pandas as pd
+
+    questions = quiz_dict.values()
+    options = [value.get("options") or {} for value in questions]
+    return pd.DataFrame({
+        "MCQ": [value.get("mcq", "") for value in questions],
+        "A": [opts.get("a", "") for opts in options],
+        "B": [opts.get("b", "") for opts in options],
+        "C": [opts.get("c", "") for opts in options],
+        "D": [opts.get("d", "") for opts in options],
+        "Correct": [value.get("correct", "") for value in questions],
+    })